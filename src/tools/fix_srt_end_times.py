@@ -3,49 +3,124 @@
 Fix SRT end times: set each block's end_time = next block's start_time.
 Last block keeps its original end_time.
 """
-import re, sys
-
-def parse_srt(content):
-    """Parse SRT into list of (index, start, end, text) tuples."""
-    blocks = []
-    pattern = re.compile(
-        r'(\d+)\n(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})\n(.+?)(?=\n\n|\n*$)',
-        re.DOTALL
-    )
-    for m in pattern.finditer(content):
-        blocks.append({
-            'index': int(m.group(1)),
-            'start': m.group(2),
-            'end': m.group(3),
-            'text': m.group(4).strip(),
-        })
-    return blocks
-
-def build_srt(blocks):
-    """Build SRT string from blocks."""
-    lines = []
-    for b in blocks:
-        lines.append(f"{b['index']}")
-        lines.append(f"{b['start']} --> {b['end']}")
-        lines.append(b['text'])
-        lines.append('')
-    return '\n'.join(lines)
-
-for filepath in sys.argv[1:]:
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    blocks = parse_srt(content)
-    if not blocks:
-        print(f"No blocks found in {filepath}", file=sys.stderr)
-        continue
-
-    # Set each block's end_time = next block's start_time
-    for i in range(len(blocks) - 1):
-        blocks[i]['end'] = blocks[i + 1]['start']
-
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(build_srt(blocks))
-
-    print(f"Fixed {len(blocks)} blocks in {filepath}")
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
+# Serialize progress prints from worker threads
+_print_lock = threading.Lock()
+
+def ts_ms(ts):
+    """Parse 'HH:MM:SS,mmm' to integer milliseconds via fixed-offset slices."""
+    return (int(ts[0:2]) * 3600000 + int(ts[3:5]) * 60000
+            + int(ts[6:8]) * 1000 + int(ts[9:12]))
+
+def iter_blocks(f):
+    """Yield SRT block dicts from an open file with a single-pass line scanner.
+
+    State machine: index line → timecode line → text lines until blank.
+    Buffers one block at a time, so peak memory stays O(block) not O(file).
+    """
+    index = None
+    start = end = None
+    text_lines = []
+
+    for line in f:
+        line = line.strip()
+        if index is None:
+            if line.isdigit():
+                index = int(line)
+        elif start is None:
+            # Cheap timecode check: "HH:MM:SS,mmm --> HH:MM:SS,mmm" is 29 chars
+            if len(line) == 29 and line[12:17] == ' --> ':
+                try:
+                    start, end = line[:12], line[17:]
+                    start_ms, end_ms = ts_ms(start), ts_ms(end)
+                except ValueError:
+                    index = start = end = None
+            else:
+                # Malformed block header; drop it and resync on the next index
+                index = None
+        elif line:
+            text_lines.append(line)
+        else:
+            if text_lines:
+                yield {
+                    'index': index,
+                    'start': start,
+                    'end': end,
+                    'start_ms': start_ms,
+                    'end_ms': end_ms,
+                    'text': '\n'.join(text_lines),
+                }
+            index = start = end = None
+            text_lines = []
+
+    # Last block may have no trailing blank line
+    if index is not None and start is not None and text_lines:
+        yield {
+            'index': index,
+            'start': start,
+            'end': end,
+            'start_ms': start_ms,
+            'end_ms': end_ms,
+            'text': '\n'.join(text_lines),
+        }
+
+def format_block(block):
+    """Format one SRT block as a single string chunk."""
+    return f"{block['index']}\n{block['start']} --> {block['end']}\n{block['text']}\n"
+
+def fix_file(filepath):
+    """Stream blocks from filepath, fixing end times, into a temp file
+    that atomically replaces the original."""
+    out_dir = os.path.dirname(os.path.abspath(filepath))
+    count = 0
+    with open(filepath, 'r', encoding='utf-8', buffering=1 << 20) as f, \
+         tempfile.NamedTemporaryFile(
+             'w', encoding='utf-8', dir=out_dir,
+             prefix='.fix_srt_', suffix='.tmp', delete=False) as out:
+        tmp_path = out.name
+        prev = None
+        for block in iter_blocks(f):
+            if prev is not None:
+                # Integer compare; the strings are only for writing back
+                if block['start_ms'] < prev['start_ms']:
+                    with _print_lock:
+                        print(f"WARNING: block {block['index']} in {filepath} "
+                              f"starts before block {prev['index']} "
+                              f"({block['start']} < {prev['start']})", file=sys.stderr)
+                # Set previous block's end_time = this block's start_time
+                prev['end'] = block['start']
+                prev['end_ms'] = block['start_ms']
+                out.write(format_block(prev) if count == 0 else '\n' + format_block(prev))
+                count += 1
+            prev = block
+        if prev is not None:
+            # Last block keeps its original end_time
+            out.write(format_block(prev) if count == 0 else '\n' + format_block(prev))
+            count += 1
+
+    if count == 0:
+        os.unlink(tmp_path)
+        with _print_lock:
+            print(f"No blocks found in {filepath}", file=sys.stderr)
+        return
+
+    # NamedTemporaryFile creates the file 0600; restore the original's
+    # permissions so the replace doesn't drop group/other read bits
+    os.chmod(tmp_path, os.stat(filepath).st_mode & 0o7777)
+    os.replace(tmp_path, filepath)
+    with _print_lock:
+        print(f"Fixed {count} blocks in {filepath}")
+
+if __name__ == '__main__':
+    files = sys.argv[1:]
+    if not files:
+        print(f"Usage: {sys.argv[0]} <srt_file> [<srt_file> ...]", file=sys.stderr)
+        sys.exit(1)
+    # Files are independent and I/O-dominated, so overlap them with threads
+    with ThreadPoolExecutor(max_workers=min(32, len(files))) as ex:
+        list(ex.map(fix_file, files))
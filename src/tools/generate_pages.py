@@ -7,105 +7,45 @@ Usage: python3 generate_pages.py /path/to/course-dir
   Writes HTML to step4-output/{course_id}.html
 """
 
+import gzip
+import html
 import json
+import os
 import sys
 from datetime import date
+from functools import lru_cache
+from itertools import groupby
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def load_config(course_dir: Path) -> tuple[dict, dict]:
-    """Load course config and transcript data."""
-    config_path = course_dir / "course.json"
-    if not config_path.exists():
-        print(f"ERROR: course.json not found at {config_path}", file=sys.stderr)
-        sys.exit(1)
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
-    config = json.loads(config_path.read_text(encoding="utf-8"))
 
-    transcripts_path = course_dir / "step4-input" / "transcripts.json"
-    if not transcripts_path.exists():
-        print(f"ERROR: transcripts.json not found at {transcripts_path}", file=sys.stderr)
-        sys.exit(1)
+def _load_json(path: Path):
+    """Parse a JSON file, via orjson (C, parses UTF-8 bytes directly)
+    when available, stdlib json otherwise."""
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    return json.loads(path.read_text(encoding="utf-8"))
 
-    data = json.loads(transcripts_path.read_text(encoding="utf-8"))
-    return config, data
+# Bump when the generated markup/CSS/JS changes, so stale fingerprints
+# don't suppress regeneration after a template edit.
+TEMPLATE_VERSION = 3
 
+# Single-pass escape table for transcript lines (the hot path); one
+# C-level str.translate per line instead of html.escape's chained replaces.
+_HTML_TRANS = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'})
 
-def build_yt_id_map(config: dict) -> dict[str, str]:
-    """Build video_id -> youtube_id mapping from config."""
-    return {v["id"]: v.get("youtube_id", "") for v in config["videos"]}
-
-
-def yt_url(video_id: str, yt_ids: dict, playlist_id: str) -> str:
-    """Build YouTube URL with playlist context."""
-    yt_id = yt_ids.get(video_id, "")
-    if not yt_id:
-        return ""
-    return f"https://www.youtube.com/watch?v={yt_id}&list={playlist_id}"
-
-
-def generate_html(config: dict, data: dict) -> str:
-    playlist_id = config["playlist_id"]
-    yt_ids = build_yt_id_map(config)
-    summaries = config.get("summaries", {})
-    chapters = config.get("chapters", {})
-
-    videos_html = []
-    toc_html = []
-    sidebar_toc_html = []
-    current_chapter = None
-
-    for v in data["videos"]:
-        vid = v["id"]
-        anchor = f"video-{vid}"
-        toc_html.append(f'<li><a href="#{anchor}">{v["full_title"]}</a></li>')
-
-        # Build sidebar TOC with chapter grouping
-        chapter = vid.split("-")[0]
-        if chapter != current_chapter:
-            if current_chapter is not None:
-                sidebar_toc_html.append('</ul>')
-            chapter_name = chapters.get(chapter, f"第 {chapter} 章")
-            sidebar_toc_html.append(f'<div class="sidebar-chapter">{chapter_name}</div>')
-            sidebar_toc_html.append('<ul>')
-            current_chapter = chapter
-        sidebar_toc_html.append(
-            f'<li><a href="#{anchor}" data-target="{anchor}">{v["full_title"]}</a></li>'
-        )
-
-        summary = summaries.get(vid, "")
-        transcript_paras = "\n".join(f"<p>{line}</p>" for line in v["lines"])
-        yt_id = yt_ids.get(vid, "")
-        yt_embed = ""
-        if yt_id:
-            yt_embed = f"""<div class="yt-thumb" onclick="loadVideo(this, '{yt_id}')" data-yt="{yt_id}">
-        <img src="https://img.youtube.com/vi/{yt_id}/hqdefault.jpg" alt="{v['full_title']}" loading="lazy">
-        <span class="yt-play">▶</span>
-      </div>"""
-
-        videos_html.append(f"""
-    <section class="video-section" id="{anchor}">
-      <h2>{v["full_title"]}</h2>
-      <p class="summary">{summary}</p>
-      <p class="meta">字幕數：{v["entry_count"]}</p>
-      {yt_embed}
-      <details>
-        <summary>展開完整逐字稿</summary>
-        <div class="transcript">{transcript_paras}</div>
-      </details>
-    </section>""")
-
-    if current_chapter is not None:
-        sidebar_toc_html.append('</ul>')
-
-    return f"""<!DOCTYPE html>
-<html lang="zh-TW">
-<head>
-<meta charset="UTF-8">
-<meta name="viewport" content="width=device-width, initial-scale=1.0">
-<title>{data["course_title"]} — 完整逐字稿</title>
-<style>
-:root {{
+# Static page chunks. Kept as plain module constants so they are not
+# re-assembled (with every brace doubled) inside an f-string on each run.
+_CSS = """:root {
   --bg: #fafafa;
   --fg: #1a1a1a;
   --bg-card: #ffffff;
@@ -119,8 +59,8 @@ def generate_html(config: dict, data: dict) -> str:
   --font-size: 1rem;
   --line-height: 1.8;
   --letter-spacing: 0;
-}}
-[data-theme="dark"] {{
+}
+[data-theme="dark"] {
   --bg: #111827;
   --fg: #f3f4f6;
   --bg-card: #1f2937;
@@ -131,9 +71,9 @@ def generate_html(config: dict, data: dict) -> str:
   --summary-border: #3b82f6;
   --meta: #9ca3af;
   --search-highlight: #854d0e;
-}}
-* {{ margin: 0; padding: 0; box-sizing: border-box; }}
-body {{
+}
+* { margin: 0; padding: 0; box-sizing: border-box; }
+body {
   font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", "Noto Sans TC", "Microsoft JhengHei", sans-serif;
   background: var(--bg);
   color: var(--fg);
@@ -141,34 +81,34 @@ body {{
   line-height: var(--line-height);
   letter-spacing: var(--letter-spacing);
   transition: background 0.3s, color 0.3s, font-size 0.2s, line-height 0.2s;
-}}
-.container {{
+}
+.container {
   max-width: 860px;
   margin: 0 auto;
   padding: 2rem 1.5rem;
-}}
-header {{
+}
+header {
   text-align: center;
   margin-bottom: 2.5rem;
   padding-bottom: 1.5rem;
   border-bottom: 2px solid var(--border);
-}}
-header h1 {{
+}
+header h1 {
   font-size: 2rem;
   margin-bottom: 0.5rem;
-}}
-header .meta-info {{
+}
+header .meta-info {
   color: var(--meta);
   font-size: inherit;
-}}
-.toolbar {{
+}
+.toolbar {
   display: flex;
   gap: 0.75rem;
   align-items: center;
   margin-bottom: 2rem;
   flex-wrap: wrap;
-}}
-.toolbar input {{
+}
+.toolbar input {
   flex: 1;
   min-width: 200px;
   padding: 0.6rem 1rem;
@@ -178,12 +118,12 @@ header .meta-info {{
   background: var(--bg-card);
   color: var(--fg);
   outline: none;
-}}
-.toolbar input:focus {{
+}
+.toolbar input:focus {
   border-color: var(--accent);
   box-shadow: 0 0 0 3px var(--accent-light);
-}}
-.toolbar button {{
+}
+.toolbar button {
   padding: 0.6rem 1rem;
   border: 1px solid var(--border);
   border-radius: 8px;
@@ -192,60 +132,60 @@ header .meta-info {{
   cursor: pointer;
   font-size: 0.95rem;
   white-space: nowrap;
-}}
-.toolbar button:hover {{
+}
+.toolbar button:hover {
   border-color: var(--accent);
-}}
-nav.toc {{
+}
+nav.toc {
   background: var(--bg-card);
   border: 1px solid var(--border);
   border-radius: 12px;
   padding: 1.25rem 1.5rem;
   margin-bottom: 2rem;
-}}
-nav.toc h3 {{
+}
+nav.toc h3 {
   margin-bottom: 0.75rem;
   font-size: 1.1rem;
-}}
-nav.toc ol {{
+}
+nav.toc ol {
   padding-left: 1.5rem;
-}}
-nav.toc li {{
+}
+nav.toc li {
   margin-bottom: 0.3rem;
-}}
-nav.toc a {{
+}
+nav.toc a {
   color: var(--accent);
   text-decoration: none;
-}}
-nav.toc a:hover {{
+}
+nav.toc a:hover {
   text-decoration: underline;
-}}
-.video-section {{
+}
+.video-section {
   background: var(--bg-card);
   border: 1px solid var(--border);
   border-radius: 12px;
   padding: 1.5rem;
   margin-bottom: 1.5rem;
-}}
-.video-section h2 {{
+}
+.video-section h2 {
   font-size: 1.35rem;
   margin-bottom: 0.75rem;
   color: var(--accent);
-}}
-.summary {{
+}
+.summary {
   background: var(--summary-bg);
   border-left: 4px solid var(--summary-border);
   padding: 0.75rem 1rem;
   border-radius: 0 8px 8px 0;
   margin-bottom: 0.75rem;
   font-size: inherit;
-}}
-.meta {{
+}
+.meta {
   color: var(--meta);
   font-size: inherit;
   margin-bottom: 0.5rem;
-}}
-.yt-thumb {{
+}
+.yt-thumb {
   display: block;
   position: relative;
   max-width: 640px;
@@ -255,17 +195,17 @@ nav.toc a:hover {{
   box-shadow: 0 2px 8px rgba(0,0,0,0.15);
   cursor: pointer;
   transition: transform 0.2s, box-shadow 0.2s;
-}}
-.yt-thumb:hover {{
+}
+.yt-thumb:hover {
   transform: scale(1.02);
   box-shadow: 0 4px 16px rgba(0,0,0,0.25);
-}}
-.yt-thumb img {{
+}
+.yt-thumb img {
   display: block;
   width: 100%;
   height: auto;
-}}
-.yt-play {{
+}
+.yt-play {
   position: absolute;
   top: 50%;
   left: 50%;
@@ -281,11 +221,11 @@ nav.toc a:hover {{
   color: #fff;
   pointer-events: none;
   transition: background 0.2s;
-}}
-.yt-thumb:hover .yt-play {{
+}
+.yt-thumb:hover .yt-play {
   background: rgba(255, 0, 0, 1);
-}}
-.video-container {{
+}
+.video-container {
   position: relative;
   max-width: 640px;
   margin: 0.75rem 0;
@@ -293,62 +233,62 @@ nav.toc a:hover {{
   border-radius: 10px;
   overflow: hidden;
   box-shadow: 0 2px 8px rgba(0,0,0,0.15);
-}}
-.video-container iframe {{
+}
+.video-container iframe {
   position: absolute;
   top: 0; left: 0;
   width: 100%; height: 100%;
   border: 0;
-}}
-details {{
+}
+details {
   margin-top: 0.5rem;
-}}
-details summary {{
+}
+details summary {
   cursor: pointer;
   color: var(--accent);
   font-weight: 500;
   padding: 0.4rem 0;
   user-select: none;
-}}
-details summary:hover {{
+}
+details summary:hover {
   text-decoration: underline;
-}}
-.transcript {{
+}
+.transcript {
   margin-top: 0.75rem;
   padding: 1rem;
   background: var(--bg);
   border-radius: 8px;
   font-size: inherit;
   line-height: inherit;
-}}
-.transcript.scrollable {{
+}
+.transcript.scrollable {
   max-height: 60vh;
   overflow-y: auto;
   scroll-behavior: smooth;
-}}
-.hidden {{
+}
+.hidden {
   display: none !important;
-}}
-mark {{
+}
+mark {
   background: var(--search-highlight);
   color: inherit;
   padding: 0 2px;
   border-radius: 2px;
-}}
-footer {{
+}
+footer {
   text-align: center;
   padding: 2rem 0 1rem;
   color: var(--meta);
   font-size: 0.85rem;
   border-top: 1px solid var(--border);
   margin-top: 2rem;
-}}
-.expand-controls {{
+}
+.expand-controls {
   display: flex;
   gap: 0.5rem;
   margin-bottom: 1.5rem;
-}}
-.expand-controls button {{
+}
+.expand-controls button {
   padding: 0.4rem 0.8rem;
   border: 1px solid var(--border);
   border-radius: 6px;
@@ -356,17 +296,17 @@ footer {{
   color: var(--fg);
   cursor: pointer;
   font-size: 0.85rem;
-}}
-.expand-controls button:hover {{
+}
+.expand-controls button:hover {
   border-color: var(--accent);
-}}
-.font-controls {{
+}
+.font-controls {
   display: flex;
   gap: 0.4rem;
   align-items: center;
   flex-wrap: wrap;
-}}
-.font-controls button {{
+}
+.font-controls button {
   padding: 0.6rem 0.8rem;
   border: 1px solid var(--border);
   border-radius: 8px;
@@ -375,31 +315,31 @@ footer {{
   cursor: pointer;
   font-size: 0.95rem;
   white-space: nowrap;
-}}
-.font-controls button:hover {{
+}
+.font-controls button:hover {
   border-color: var(--accent);
-}}
-.font-controls button.active {{
+}
+.font-controls button.active {
   background: var(--accent);
   color: #fff;
   border-color: var(--accent);
-}}
-.font-controls .size-label {{
+}
+.font-controls .size-label {
   font-size: 0.85rem;
   color: var(--meta);
   min-width: 2.5rem;
   text-align: center;
-}}
-@media (max-width: 600px) {{
-  .container {{ padding: 1rem; }}
-  header h1 {{ font-size: 1.5rem; }}
-  .toolbar {{ flex-direction: column; }}
-  .toolbar input {{ min-width: 100%; }}
-  .font-controls {{ justify-content: center; }}
-}}
+}
+@media (max-width: 600px) {
+  .container { padding: 1rem; }
+  header h1 { font-size: 1.5rem; }
+  .toolbar { flex-direction: column; }
+  .toolbar input { min-width: 100%; }
+  .font-controls { justify-content: center; }
+}
 
 /* Floating TOC Sidebar */
-#floating-toc {{
+#floating-toc {
   position: fixed;
   top: 0;
   left: 0;
@@ -413,30 +353,30 @@ footer {{
   transition: transform 0.3s ease, background 0.3s;
   scrollbar-width: thin;
   scrollbar-color: var(--border) transparent;
-}}
-#floating-toc::-webkit-scrollbar {{
+}
+#floating-toc::-webkit-scrollbar {
   width: 4px;
-}}
-#floating-toc::-webkit-scrollbar-track {{
+}
+#floating-toc::-webkit-scrollbar-track {
   background: transparent;
-}}
-#floating-toc::-webkit-scrollbar-thumb {{
+}
+#floating-toc::-webkit-scrollbar-thumb {
   background: var(--border);
   border-radius: 2px;
-}}
-#floating-toc .sidebar-header {{
+}
+#floating-toc .sidebar-header {
   display: flex;
   align-items: center;
   justify-content: space-between;
   margin-bottom: 1rem;
   padding-bottom: 0.75rem;
   border-bottom: 1px solid var(--border);
-}}
-#floating-toc .sidebar-header h3 {{
+}
+#floating-toc .sidebar-header h3 {
   font-size: 1rem;
   margin: 0;
-}}
-#floating-toc .sidebar-close {{
+}
+#floating-toc .sidebar-close {
   background: none;
   border: none;
   color: var(--meta);
@@ -444,11 +384,11 @@ footer {{
   font-size: 1.2rem;
   padding: 0.2rem;
   line-height: 1;
-}}
-#floating-toc .sidebar-close:hover {{
+}
+#floating-toc .sidebar-close:hover {
   color: var(--fg);
-}}
-.sidebar-chapter {{
+}
+.sidebar-chapter {
   font-size: 0.75rem;
   font-weight: 600;
   color: var(--meta);
@@ -457,13 +397,13 @@ footer {{
   margin-top: 0.75rem;
   margin-bottom: 0.25rem;
   padding-left: 0.5rem;
-}}
-#floating-toc ul {{
+}
+#floating-toc ul {
   list-style: none;
   padding: 0;
   margin: 0 0 0.25rem 0;
-}}
-#floating-toc li a {{
+}
+#floating-toc li a {
   display: block;
   padding: 0.35rem 0.5rem;
   border-radius: 6px;
@@ -475,19 +415,19 @@ footer {{
   white-space: nowrap;
   overflow: hidden;
   text-overflow: ellipsis;
-}}
-#floating-toc li a:hover {{
+}
+#floating-toc li a:hover {
   background: var(--accent-light);
   color: var(--accent);
-}}
-#floating-toc li a.active {{
+}
+#floating-toc li a.active {
   background: var(--accent-light);
   color: var(--accent);
   font-weight: 600;
-}}
+}
 
 /* Toggle button */
-#toc-toggle {{
+#toc-toggle {
   position: fixed;
   top: 1rem;
   left: 1rem;
@@ -505,110 +445,59 @@ footer {{
   justify-content: center;
   box-shadow: 0 2px 8px rgba(0,0,0,0.1);
   transition: background 0.3s, transform 0.3s;
-}}
-#toc-toggle:hover {{
+}
+#toc-toggle:hover {
   border-color: var(--accent);
-}}
+}
 
 /* Body shift when sidebar is open */
-body.sidebar-open {{
+body.sidebar-open {
   margin-left: 260px;
   transition: margin-left 0.3s ease;
-}}
-body {{
+}
+body {
   transition: margin-left 0.3s ease;
-}}
+}
 
 /* Hide sidebar when closed */
-#floating-toc.closed {{
+#floating-toc.closed {
   transform: translateX(-100%);
-}}
-body.sidebar-open #toc-toggle {{
+}
+body.sidebar-open #toc-toggle {
   left: 268px;
-}}
+}
 
 /* Responsive: hide sidebar on narrow screens */
-@media (max-width: 1200px) {{
-  #floating-toc {{
+@media (max-width: 1200px) {
+  #floating-toc {
     transform: translateX(-100%);
     box-shadow: 2px 0 16px rgba(0,0,0,0.15);
-  }}
-  #floating-toc.mobile-open {{
+  }
+  #floating-toc.mobile-open {
     transform: translateX(0);
-  }}
-  body.sidebar-open {{
+  }
+  body.sidebar-open {
     margin-left: 0;
-  }}
-  body.sidebar-open #toc-toggle {{
+  }
+  body.sidebar-open #toc-toggle {
     left: 1rem;
-  }}
-  #toc-toggle {{
+  }
+  #toc-toggle {
     display: flex;
-  }}
-}}
-@media (min-width: 1201px) {{
+  }
+}
+@media (min-width: 1201px) {
   /* On wide screens, sidebar is open by default */
-  #floating-toc {{
+  #floating-toc {
     transform: translateX(0);
-  }}
-  #floating-toc.closed {{
+  }
+  #floating-toc.closed {
     transform: translateX(-100%);
-  }}
-}}
-</style>
-</head>
-<body>
-<button id="toc-toggle" onclick="toggleSidebar()" title="目錄">☰</button>
-<aside id="floating-toc">
-  <div class="sidebar-header">
-    <h3>目錄</h3>
-    <button class="sidebar-close" onclick="toggleSidebar()" title="關閉目錄">✕</button>
-  </div>
-  {"".join(sidebar_toc_html)}
-</aside>
-<div class="container">
-  <header>
-    <h1>{data["course_title"]}</h1>
-    <div class="meta-info">
-      講師：{data["author"]} ・ 共 {data["total_videos"]} 支影片 ・ 生成日期：{date.today().isoformat()}
-    </div>
-  </header>
+  }
+}"""
 
-  <div class="toolbar">
-    <input type="text" id="search" placeholder="搜尋逐字稿內容..." autocomplete="off">
-    <button onclick="clearSearch()">清除</button>
-    <button onclick="toggleTheme()" id="theme-btn">🌙 深色模式</button>
-  </div>
-
-  <div class="expand-controls">
-    <button onclick="expandAll()">全部展開</button>
-    <button onclick="collapseAll()">全部收合</button>
-    <span style="margin-left: auto;"></span>
-    <div class="font-controls">
-      <button onclick="changeFontSize(-1)" title="縮小字體">A-</button>
-      <span class="size-label" id="size-label">M</span>
-      <button onclick="changeFontSize(1)" title="放大字體">A+</button>
-      <button onclick="toggleEyeFriendly()" id="eye-btn">👁 護眼模式</button>
-    </div>
-  </div>
-
-  <nav class="toc">
-    <h3>目錄</h3>
-    <ol>
-      {"".join(toc_html)}
-    </ol>
-  </nav>
-
-  {"".join(videos_html)}
-
-  <footer>
-    {data["course_title"]} — {data["author"]} ・ 逐字稿由 AI 視覺辨識燒入字幕提取
-  </footer>
-</div>
-
-<script>
-// Click-to-load YouTube player (replaces thumbnail with iframe)
-function loadVideo(el, ytId) {{
+_JS = """// Click-to-load YouTube player (replaces thumbnail with iframe)
+function loadVideo(el, ytId) {
   const container = document.createElement('div');
   container.className = 'video-container';
   container.innerHTML = '<iframe width="560" height="315"'
@@ -620,16 +509,16 @@ function loadVideo(el, ytId) {{
   el.replaceWith(container);
   // Auto-expand transcript and make it scrollable
   const section = container.closest('.video-section');
-  if (section) {{
+  if (section) {
     const details = section.querySelector('details');
     const transcript = section.querySelector('.transcript');
     if (details) details.open = true;
     if (transcript) transcript.classList.add('scrollable');
-  }}
-}}
+  }
+}
 
 // Dark mode toggle
-function toggleTheme() {{
+function toggleTheme() {
   const body = document.documentElement;
   const current = body.getAttribute('data-theme');
   const next = current === 'dark' ? 'light' : 'dark';
@@ -637,107 +526,152 @@ function toggleTheme() {{
   localStorage.setItem('theme', next);
   document.getElementById('theme-btn').textContent =
     next === 'dark' ? '☀️ 淺色模式' : '🌙 深色模式';
-}}
+}
 
 // Restore theme
-(function() {{
+(function() {
   const saved = localStorage.getItem('theme');
-  if (saved === 'dark') {{
+  if (saved === 'dark') {
     document.documentElement.setAttribute('data-theme', 'dark');
-    document.addEventListener('DOMContentLoaded', () => {{
+    document.addEventListener('DOMContentLoaded', () => {
       document.getElementById('theme-btn').textContent = '☀️ 淺色模式';
-    }});
-  }}
-}})();
+    });
+  }
+})();
 
 // Search
 const searchInput = document.getElementById('search');
 let searchTimeout;
-searchInput.addEventListener('input', () => {{
+let activeMarks = [];  // <mark> nodes created by the current highlight pass
+searchInput.addEventListener('input', () => {
   clearTimeout(searchTimeout);
   searchTimeout = setTimeout(doSearch, 300);
-}});
-
-function doSearch() {{
+});
+
+// Transcript paragraphs ship inside inert <template> tags and only enter
+// the DOM the first time their section is opened or searched.
+function materializeTranscript(section) {
+  const tpl = section.querySelector('template.transcript-src');
+  if (!tpl) return;
+  section.querySelector('.transcript').appendChild(tpl.content);
+  tpl.remove();
+}
+
+document.querySelectorAll('.video-section details').forEach(d => {
+  d.addEventListener('toggle', () => {
+    if (d.open) materializeTranscript(d.closest('.video-section'));
+  });
+});
+
+// Lazily-built Set views over SEARCH_INDEX for O(1) token membership
+const _tokenSets = {};
+function tokenSet(vid) {
+  let s = _tokenSets[vid];
+  if (!s) s = _tokenSets[vid] = new Set(SEARCH_INDEX[vid] || []);
+  return s;
+}
+
+function queryGrams(query) {
+  const t = query.replace(/\s+/g, '');
+  const grams = [];
+  for (let i = 0; i < t.length - 1; i++) grams.push(t.slice(i, i + 2));
+  return grams;
+}
+
+function doSearch() {
   const query = searchInput.value.trim().toLowerCase();
   const sections = document.querySelectorAll('.video-section');
 
-  // Clear previous highlights
-  document.querySelectorAll('mark').forEach(m => {{
-    m.replaceWith(m.textContent);
-  }});
+  // Clear previous highlights without walking the whole document
+  activeMarks.splice(0).forEach(m => {
+    m.replaceWith(document.createTextNode(m.textContent));
+  });
 
-  if (!query) {{
+  if (!query) {
     sections.forEach(s => s.classList.remove('hidden'));
     return;
-  }}
-
-  sections.forEach(section => {{
+  }
+
+  // Prefilter against the build-time index: a section can only match if it
+  // contains every bigram of the query. Single-char queries have no grams
+  // and fall through to the text scan.
+  const grams = (typeof SEARCH_INDEX !== 'undefined') ? queryGrams(query) : [];
+
+  sections.forEach(section => {
+    if (grams.length) {
+      const set = tokenSet(section.id.slice('video-'.length));
+      if (!grams.every(g => set.has(g))) {
+        section.classList.add('hidden');
+        return;
+      }
+    }
+    materializeTranscript(section);  // template content is invisible to textContent
     const text = section.textContent.toLowerCase();
-    if (text.includes(query)) {{
+    if (text.includes(query)) {
       section.classList.remove('hidden');
       // Open details if match is in transcript
       const details = section.querySelector('details');
       const transcript = section.querySelector('.transcript');
-      if (transcript && transcript.textContent.toLowerCase().includes(query)) {{
+      if (transcript && transcript.textContent.toLowerCase().includes(query)) {
         details.open = true;
         highlightText(transcript, query);
-      }}
+      }
       // Also highlight in summary
       const summary = section.querySelector('.summary');
-      if (summary && summary.textContent.toLowerCase().includes(query)) {{
+      if (summary && summary.textContent.toLowerCase().includes(query)) {
         highlightText(summary, query);
-      }}
-    }} else {{
+      }
+    } else {
       section.classList.add('hidden');
-    }}
-  }});
-}}
+    }
+  });
+}
 
-function highlightText(el, query) {{
+function highlightText(el, query) {
   const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
   const nodes = [];
   while (walker.nextNode()) nodes.push(walker.currentNode);
-  nodes.forEach(node => {{
+  nodes.forEach(node => {
     const idx = node.textContent.toLowerCase().indexOf(query);
-    if (idx >= 0) {{
+    if (idx >= 0) {
       const span = document.createElement('span');
       span.innerHTML = node.textContent.substring(0, idx)
         + '<mark>' + node.textContent.substring(idx, idx + query.length) + '</mark>'
         + node.textContent.substring(idx + query.length);
       node.replaceWith(span);
-    }}
-  }});
-}}
+      activeMarks.push(...span.querySelectorAll('mark'));
+    }
+  });
+}
 
-function clearSearch() {{
+function clearSearch() {
   searchInput.value = '';
   doSearch();
-}}
+}
 
-function expandAll() {{
+function expandAll() {
   document.querySelectorAll('details').forEach(d => d.open = true);
-}}
+}
 
-function collapseAll() {{
+function collapseAll() {
   document.querySelectorAll('details').forEach(d => d.open = false);
-}}
+}
 
 // Font size control
 const SIZES = [
-  {{ label: 'XS', size: '0.85rem', line: '1.6', spacing: '0' }},
-  {{ label: 'S',  size: '0.95rem', line: '1.8', spacing: '0' }},
-  {{ label: 'M',  size: '1rem',    line: '1.8', spacing: '0' }},
-  {{ label: 'L',  size: '1.15rem', line: '2.0', spacing: '0.02em' }},
-  {{ label: 'XL', size: '1.3rem',  line: '2.2', spacing: '0.03em' }},
-  {{ label: '2XL', size: '1.5rem', line: '2.4', spacing: '0.04em' }},
+  { label: 'XS', size: '0.85rem', line: '1.6', spacing: '0' },
+  { label: 'S',  size: '0.95rem', line: '1.8', spacing: '0' },
+  { label: 'M',  size: '1rem',    line: '1.8', spacing: '0' },
+  { label: 'L',  size: '1.15rem', line: '2.0', spacing: '0.02em' },
+  { label: 'XL', size: '1.3rem',  line: '2.2', spacing: '0.03em' },
+  { label: '2XL', size: '1.5rem', line: '2.4', spacing: '0.04em' },
 ];
 let currentSizeIdx = parseInt(localStorage.getItem('fontSizeIdx') || '2');
 let eyeFriendly = localStorage.getItem('eyeFriendly') === 'true';
 let preEyeTheme = localStorage.getItem('preEyeTheme') || 'light';
 let preEyeSizeIdx = parseInt(localStorage.getItem('preEyeSizeIdx') || '2');
 
-function applyFontSize() {{
+function applyFontSize() {
   const s = SIZES[currentSizeIdx];
   const root = document.documentElement;
   root.style.setProperty('--font-size', s.size);
@@ -745,21 +679,21 @@ function applyFontSize() {{
   root.style.setProperty('--letter-spacing', s.spacing);
   document.getElementById('size-label').textContent = s.label;
   localStorage.setItem('fontSizeIdx', currentSizeIdx);
-}}
+}
 
-function changeFontSize(delta) {{
+function changeFontSize(delta) {
   currentSizeIdx = Math.max(0, Math.min(SIZES.length - 1, currentSizeIdx + delta));
   applyFontSize();
-}}
+}
 
-function toggleEyeFriendly() {{
+function toggleEyeFriendly() {
   eyeFriendly = !eyeFriendly;
   applyEyeFriendly();
-}}
+}
 
-function applyEyeFriendly() {{
+function applyEyeFriendly() {
   const btn = document.getElementById('eye-btn');
-  if (eyeFriendly) {{
+  if (eyeFriendly) {
     // Save current state before switching
     preEyeTheme = document.documentElement.getAttribute('data-theme') || 'light';
     preEyeSizeIdx = currentSizeIdx;
@@ -773,7 +707,7 @@ function applyEyeFriendly() {{
     localStorage.setItem('theme', 'dark');
     btn.textContent = '👁 護眼開啟';
     btn.classList.add('active');
-  }} else {{
+  } else {
     // Restore previous theme
     const restoreTheme = preEyeTheme || 'light';
     document.documentElement.setAttribute('data-theme', restoreTheme);
@@ -785,73 +719,73 @@ function applyEyeFriendly() {{
     applyFontSize();
     btn.textContent = '👁 護眼模式';
     btn.classList.remove('active');
-  }}
+  }
   localStorage.setItem('eyeFriendly', eyeFriendly);
-}}
+}
 
 // Floating TOC Sidebar
-function toggleSidebar() {{
+function toggleSidebar() {
   const sidebar = document.getElementById('floating-toc');
   const isWide = window.innerWidth > 1200;
 
-  if (isWide) {{
+  if (isWide) {
     sidebar.classList.toggle('closed');
     document.body.classList.toggle('sidebar-open');
     localStorage.setItem('sidebarOpen', !sidebar.classList.contains('closed'));
-  }} else {{
+  } else {
     sidebar.classList.toggle('mobile-open');
-  }}
-}}
+  }
+}
 
 // Active section tracking with IntersectionObserver
-function initSidebarObserver() {{
+function initSidebarObserver() {
   const sidebarLinks = document.querySelectorAll('#floating-toc a[data-target]');
   const sections = document.querySelectorAll('.video-section');
 
   if (!sections.length) return;
 
-  const observer = new IntersectionObserver((entries) => {{
-    entries.forEach(entry => {{
-      if (entry.isIntersecting) {{
+  const observer = new IntersectionObserver((entries) => {
+    entries.forEach(entry => {
+      if (entry.isIntersecting) {
         // Remove active from all links
         sidebarLinks.forEach(link => link.classList.remove('active'));
         // Add active to matching link
         const target = entry.target.id;
         const activeLink = document.querySelector(
-          `#floating-toc a[data-target="${{target}}"]`
+          `#floating-toc a[data-target="${target}"]`
         );
-        if (activeLink) {{
+        if (activeLink) {
           activeLink.classList.add('active');
           // Auto-scroll sidebar to keep active link visible
-          activeLink.scrollIntoView({{ block: 'nearest', behavior: 'smooth' }});
-        }}
-      }}
-    }});
-  }}, {{
+          activeLink.scrollIntoView({ block: 'nearest', behavior: 'smooth' });
+        }
+      }
+    });
+  }, {
     rootMargin: '-10% 0px -80% 0px',
     threshold: 0
-  }});
+  });
 
   sections.forEach(section => observer.observe(section));
-}}
+}
 
 // Sidebar click handler: smooth scroll + close on mobile
-document.getElementById('floating-toc').addEventListener('click', (e) => {{
+document.getElementById('floating-toc').addEventListener('click', (e) => {
   const link = e.target.closest('a[data-target]');
   if (!link) return;
   e.preventDefault();
   const target = document.getElementById(link.dataset.target);
-  if (target) {{
-    target.scrollIntoView({{ behavior: 'smooth', block: 'start' }});
-  }}
+  if (target) {
+    target.scrollIntoView({ behavior: 'smooth', block: 'start' });
+  }
   // Close sidebar on mobile after click
-  if (window.innerWidth <= 1200) {{
+  if (window.innerWidth <= 1200) {
     document.getElementById('floating-toc').classList.remove('mobile-open');
-  }}
-}});
+  }
+});
 
 // Restore on load
-document.addEventListener('DOMContentLoaded', () => {{
+document.addEventListener('DOMContentLoaded', () => {
   applyFontSize();
   if (eyeFriendly) applyEyeFriendly();
 
@@ -859,22 +793,225 @@ document.addEventListener('DOMContentLoaded', () => {{
   const isWide = window.innerWidth > 1200;
   const sidebarPref = localStorage.getItem('sidebarOpen');
   const sidebar = document.getElementById('floating-toc');
-  if (isWide) {{
-    if (sidebarPref === 'false') {{
+  if (isWide) {
+    if (sidebarPref === 'false') {
       sidebar.classList.add('closed');
-    }} else {{
+    } else {
       document.body.classList.add('sidebar-open');
-    }}
-  }}
+    }
+  }
 
   // Init observer
   initSidebarObserver();
-}});
-</script>
+});"""
+
+
+@lru_cache(maxsize=32)
+def _load_config_cached(config_path: str, config_mtime: int,
+                        transcripts_path: str, transcripts_mtime: int) -> tuple[dict, dict]:
+    """Parse both JSON inputs. Keyed on (path, mtime) so repeated
+    generations over an unchanged course skip the re-parse."""
+    config = _load_json(Path(config_path))
+    data = _load_json(Path(transcripts_path))
+    return config, data
+
+
+def load_config(course_dir: Path) -> tuple[dict, dict]:
+    """Load course config and transcript data."""
+    config_path = course_dir / "course.json"
+    if not config_path.exists():
+        print(f"ERROR: course.json not found at {config_path}", file=sys.stderr)
+        sys.exit(1)
+
+    transcripts_path = course_dir / "step4-input" / "transcripts.json"
+    if not transcripts_path.exists():
+        print(f"ERROR: transcripts.json not found at {transcripts_path}", file=sys.stderr)
+        sys.exit(1)
+
+    return _load_config_cached(
+        str(config_path), config_path.stat().st_mtime_ns,
+        str(transcripts_path), transcripts_path.stat().st_mtime_ns,
+    )
+
+
+def build_yt_id_map(config: dict) -> dict[str, str]:
+    """Build video_id -> youtube_id mapping from config."""
+    return {v["id"]: v.get("youtube_id", "") for v in config["videos"]}
+
+
+def _search_tokens(text: str) -> list[str]:
+    """Sorted unique 2-gram shingles of the lowercased text.
+
+    The content is mostly CJK with no word boundaries, so bigrams are the
+    natural index unit; they also work fine for Latin substrings."""
+    t = "".join(text.lower().split())
+    return sorted({t[i:i + 2] for i in range(len(t) - 1)})
+
+
+def generate_html_parts(config: dict, data: dict):
+    """Yield the page as a sequence of string chunks.
+
+    Streaming chunks to the caller avoids materializing the full document
+    (hundreds of KB for long courses) as one giant f-string in memory.
+    """
+    yt_ids = build_yt_id_map(config)
+    summaries = config.get("summaries", {})
+    chapters = config.get("chapters", {})
+    esc = html.escape  # user-derived text must not reach the page raw
+
+    course_title = esc(data["course_title"])
+    author = esc(data["author"])
+
+    toc_html = [
+        f'<li><a href="#video-{v["id"]}">{esc(v["full_title"])}</a></li>'
+        for v in data["videos"]
+    ]
+
+    # Sidebar TOC: one chunk per chapter instead of a stateful per-video loop
+    sidebar_toc_html = []
+    for chapter, group in groupby(data["videos"], key=lambda v: v["id"].partition("-")[0]):
+        chapter_name = esc(chapters.get(chapter, f"第 {chapter} 章"))
+        entries = "".join(
+            f'<li><a href="#video-{v["id"]}" data-target="video-{v["id"]}">'
+            f'{esc(v["full_title"])}</a></li>'
+            for v in group
+        )
+        sidebar_toc_html.append(
+            f'<div class="sidebar-chapter">{chapter_name}</div><ul>{entries}</ul>'
+        )
+
+    yield f"""<!DOCTYPE html>
+<html lang="zh-TW">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{course_title} — 完整逐字稿</title>
+<link rel="stylesheet" href="assets/course.css">
+</head>
+<body>
+<button id="toc-toggle" onclick="toggleSidebar()" title="目錄">☰</button>
+<aside id="floating-toc">
+  <div class="sidebar-header">
+    <h3>目錄</h3>
+    <button class="sidebar-close" onclick="toggleSidebar()" title="關閉目錄">✕</button>
+  </div>
+  {"".join(sidebar_toc_html)}
+</aside>
+<div class="container">
+  <header>
+    <h1>{course_title}</h1>
+    <div class="meta-info">
+      講師：{author} ・ 共 {data["total_videos"]} 支影片 ・ 生成日期：{date.today().isoformat()}
+    </div>
+  </header>
+
+  <div class="toolbar">
+    <input type="text" id="search" placeholder="搜尋逐字稿內容..." autocomplete="off">
+    <button onclick="clearSearch()">清除</button>
+    <button onclick="toggleTheme()" id="theme-btn">🌙 深色模式</button>
+  </div>
+
+  <div class="expand-controls">
+    <button onclick="expandAll()">全部展開</button>
+    <button onclick="collapseAll()">全部收合</button>
+    <span style="margin-left: auto;"></span>
+    <div class="font-controls">
+      <button onclick="changeFontSize(-1)" title="縮小字體">A-</button>
+      <span class="size-label" id="size-label">M</span>
+      <button onclick="changeFontSize(1)" title="放大字體">A+</button>
+      <button onclick="toggleEyeFriendly()" id="eye-btn">👁 護眼模式</button>
+    </div>
+  </div>
+
+  <nav class="toc">
+    <h3>目錄</h3>
+    <ol>
+      {"".join(toc_html)}
+    </ol>
+  </nav>
+
+  """
+
+    for v in data["videos"]:
+        vid = v["id"]
+        anchor = f"video-{vid}"
+        summary = esc(summaries.get(vid, ""))
+        full_title = esc(v["full_title"])
+        lines = v["lines"]
+        transcript_paras = (
+            "<p>" + "</p>\n<p>".join(l.translate(_HTML_TRANS) for l in lines) + "</p>"
+            if lines else ""
+        )
+        yt_id = yt_ids.get(vid, "")
+        yt_embed = ""
+        if yt_id:
+            yt_embed = f"""<div class="yt-thumb" onclick="loadVideo(this, '{yt_id}')" data-yt="{yt_id}">
+        <img src="https://img.youtube.com/vi/{yt_id}/hqdefault.jpg" alt="{full_title}" loading="lazy">
+        <span class="yt-play">▶</span>
+      </div>"""
+
+        yield f"""
+    <section class="video-section" id="{anchor}">
+      <h2>{full_title}</h2>
+      <p class="summary">{summary}</p>
+      <p class="meta">字幕數：{v["entry_count"]}</p>
+      {yt_embed}
+      <details>
+        <summary>展開完整逐字稿</summary>
+        <template class="transcript-src">{transcript_paras}</template>
+        <div class="transcript"></div>
+      </details>
+    </section>"""
+
+    # Build-time inverted index: video_id -> bigram tokens over everything
+    # searchable in its section (title, summary, transcript). The deferred
+    # course.js narrows each keystroke to candidate sections via this index
+    # instead of scanning every section's textContent.
+    search_index = {
+        v["id"]: _search_tokens(
+            " ".join([v["full_title"], summaries.get(v["id"], ""), *v["lines"]])
+        )
+        for v in data["videos"]
+    }
+    yield f"""
+
+  <footer>
+    {course_title} — {author} ・ 逐字稿由 AI 視覺辨識燒入字幕提取
+  </footer>
+</div>
+
+<script>const SEARCH_INDEX = {json.dumps(search_index, ensure_ascii=False)};</script>
+<script src="assets/course.js" defer></script>
 </body>
 </html>"""
 
 
+def write_assets(out_dir: Path) -> None:
+    """Write the shared course.css / course.js next to the HTML output.
+
+    Skipped when already up to date, so repeated runs (and multiple courses
+    sharing an output dir) don't rewrite identical bytes."""
+    assets_dir = out_dir / "assets"
+    assets_dir.mkdir(parents=True, exist_ok=True)
+    for name, content in (("course.css", _CSS), ("course.js", _JS)):
+        path = assets_dir / name
+        if not path.exists() or path.read_text(encoding="utf-8") != content:
+            path.write_text(content, encoding="utf-8")
+
+
+def write_compressed(html_path: Path) -> None:
+    """Write .gz (and .br when brotli is installed) siblings of the HTML.
+
+    Static hosts with gzip_static/brotli_static support serve the
+    precompressed bytes directly; the mostly-repetitive markup and CJK
+    text compress around 10:1."""
+    raw = html_path.read_bytes()
+    with gzip.open(f"{html_path}.gz", "wb", compresslevel=9) as gz:
+        gz.write(raw)
+    if brotli is not None:
+        Path(f"{html_path}.br").write_bytes(brotli.compress(raw, quality=11))
+
+
 def main():
     if len(sys.argv) < 2:
         print("Usage: python3 generate_pages.py /path/to/course-dir", file=sys.stderr)
@@ -887,10 +1024,29 @@ def main():
     out_dir = course_dir / "step4-output"
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    html = generate_html(config, data)
     html_path = out_dir / f"{course_id}.html"
-    html_path.write_text(html, encoding="utf-8")
-    print(f"Wrote {html_path} ({len(html):,} chars)")
+    fingerprint_path = out_dir / ".fingerprint"
+    fingerprint = "{}:{}:{}".format(
+        (course_dir / "course.json").stat().st_mtime_ns,
+        (course_dir / "step4-input" / "transcripts.json").stat().st_mtime_ns,
+        TEMPLATE_VERSION,
+    )
+    if (html_path.exists() and fingerprint_path.exists()
+            and fingerprint_path.read_text() == fingerprint):
+        print(f"Unchanged {html_path} (inputs and template match last run)")
+        return
+
+    write_assets(out_dir)
+    with open(html_path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        f.writelines(generate_html_parts(config, data))
+
+    write_compressed(html_path)
+
+    # Record the fingerprint atomically so a crash can't leave a stale match
+    tmp_path = fingerprint_path.with_suffix(".fingerprint.tmp")
+    tmp_path.write_text(fingerprint)
+    os.replace(tmp_path, fingerprint_path)
+    print(f"Wrote {html_path} ({html_path.stat().st_size:,} bytes)")
 
 
 if __name__ == "__main__":
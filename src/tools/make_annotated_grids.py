@@ -22,15 +22,27 @@ Example:
 
 import argparse
 import os
-import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
 from PIL import Image, ImageDraw, ImageFont
 
 
+def _load_frame(path: Path) -> Image.Image:
+    """Open and fully decode a frame (Image.open alone is lazy)."""
+    img = Image.open(path)
+    img.load()
+    return img
+
+
+@lru_cache(maxsize=None)
 def format_srt_time(seconds: int) -> str:
-    """Convert seconds to HH:MM:SS format."""
+    """Convert seconds to HH:MM:SS format.
+
+    Memoized: each second is formatted twice per run (grid label + TSV
+    row), and the domain is small (one entry per second of video)."""
     h = seconds // 3600
     m = (seconds % 3600) // 60
     s = seconds % 60
@@ -39,17 +51,22 @@ def format_srt_time(seconds: int) -> str:
 
 def find_frames(frames_dir: Path, video_id: str) -> list[tuple[int, Path]]:
     """Find all individual frame files (not grids) for a video, sorted by frame number."""
-    pattern = re.compile(rf"^{re.escape(video_id)}_(\d{{4}})\.jpg$")
+    prefix = f"{video_id}_"
     frames = []
-    for f in os.listdir(frames_dir):
-        match = pattern.match(f)
-        if match:
-            frame_num = int(match.group(1))
-            frames.append((frame_num, frames_dir / f))
+    with os.scandir(frames_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            if not (name.startswith(prefix) and name.endswith(".jpg")):
+                continue
+            frame_num = name[len(prefix):-4]
+            if len(frame_num) != 4 or not frame_num.isdigit():
+                continue  # grids and other composites don't match _NNNN
+            frames.append((int(frame_num), Path(entry.path)))
     frames.sort()
     return frames
 
 
+@lru_cache(maxsize=None)
 def get_font(size: int) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
     """Try to load a good monospace font, fall back to default."""
     font_paths = [
@@ -67,11 +84,46 @@ def get_font(size: int) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
     return ImageFont.load_default()
 
 
+# Every character a row label can contain: "_NNNN", "Xs", "HH:MM:SS"
+_LABEL_CHARSET = "0123456789:s_"
+
+
+@lru_cache(maxsize=4)
+def _glyph_tiles(font) -> dict[str, Image.Image]:
+    """Pre-render each label glyph once on the label background.
+
+    Labels repeat the same dozen characters thousands of times across a
+    video's grids; pasting cached tiles skips FreeType rasterization in
+    the per-row loop."""
+    tiles = {}
+    for ch in _LABEL_CHARSET:
+        left, top, right, bottom = font.getbbox(ch)
+        tile = Image.new("RGB", (max(right, 1), max(bottom, 1)), (30, 30, 30))
+        ImageDraw.Draw(tile).text((0, 0), ch, fill=(0, 255, 0), font=font)
+        tiles[ch] = tile
+    return tiles
+
+
+def _paste_label(dest: Image.Image, xy: tuple[int, int], text: str, font) -> None:
+    """Paste a multi-line label assembled from cached glyph tiles."""
+    tiles = _glyph_tiles(font)
+    x0, y = xy
+    line_h = max(tile.height for tile in tiles.values()) + 4
+    for line in text.split("\n"):
+        x = x0
+        for ch in line:
+            tile = tiles[ch]
+            dest.paste(tile, (x, y))
+            x += tile.width
+        y += line_h
+
+
 def create_annotated_grid(
     frames: list[tuple[int, Path]],
     output_path: Path,
     label_width: int = 280,
     font_size: int = 28,
+    font=None,
 ):
     """
     Create a single annotated grid image from a list of frames.
@@ -82,51 +134,42 @@ def create_annotated_grid(
     if not frames:
         return
 
-    font = get_font(font_size)
+    if font is None:
+        font = get_font(font_size)
 
     # Load first frame to get dimensions
-    sample = Image.open(frames[0][1])
+    sample = _load_frame(frames[0][1])
     frame_w, frame_h = sample.size
 
     grid_w = label_width + frame_w
     grid_h = frame_h * len(frames)
 
     grid = Image.new("RGB", (grid_w, grid_h), color=(0, 0, 0))
-    draw = ImageDraw.Draw(grid)
 
-    for i, (frame_num, frame_path) in enumerate(frames):
-        # Load frame
-        frame_img = Image.open(frame_path)
+    # Render the whole label column once: the background fill comes from
+    # Image.new (no per-row rectangle), and one Draw handle writes every
+    # label and row separator before a single paste into the grid.
+    label_col = Image.new("RGB", (label_width, grid_h), color=(30, 30, 30))
+    label_draw = ImageDraw.Draw(label_col)
+    for i, (frame_num, _) in enumerate(frames):
         y_offset = i * frame_h
-
-        # Draw label background
-        draw.rectangle(
-            [(0, y_offset), (label_width - 1, y_offset + frame_h - 1)],
-            fill=(30, 30, 30),
-        )
-
-        # Draw label text
         sec = frame_num - 1
         srt_time = format_srt_time(sec)
         label = f"_{frame_num:04d}\n{sec}s\n{srt_time}"
-
-        # Center text vertically in the row
-        draw.text(
-            (10, y_offset + 8),
-            label,
-            fill=(0, 255, 0),  # green text on dark bg
-            font=font,
-        )
-
-        # Draw separator line
-        draw.line(
-            [(0, y_offset), (grid_w, y_offset)],
+        _paste_label(label_col, (10, y_offset + 8), label, font)
+        label_draw.line(
+            [(0, y_offset), (label_width, y_offset)],
             fill=(80, 80, 80),
             width=1,
         )
+    grid.paste(label_col, (0, 0))
 
-        # Paste frame image
-        grid.paste(frame_img, (label_width, y_offset))
+    # Decode the row frames on a thread pool (JPEG decode releases the GIL)
+    # so decoding overlaps with composition; map preserves row order.
+    with ThreadPoolExecutor() as ex:
+        frame_imgs = ex.map(_load_frame, [path for _, path in frames])
+        for i, frame_img in enumerate(frame_imgs):
+            grid.paste(frame_img, (label_width, i * frame_h))
 
     grid.save(output_path, quality=90)
 
@@ -163,22 +206,24 @@ def main():
 
     print(f"Found {len(frames)} frames for video '{args.video_id}'")
 
-    # Split into batches
+    # Load the font once; every grid shares it (and its glyph tile cache)
+    font = get_font(args.font_size)
+
+    # Split into batches; grid numbers are zero-padded to 2 or 3 digits
     total_grids = (len(frames) + args.batch - 1) // args.batch
-    grid_fmt = "%03d" if total_grids > 99 else "%02d"
+    pad = 3 if total_grids > 99 else 2
 
+    # The sidecar TSV (grid row -> exact SRT timestamp) is accumulated in
+    # the same pass as the grids and flushed with a single write at the end.
+    tsv_path = output_dir / f"{args.video_id}_timestamps.tsv"
+    tsv_rows = ["grid_file\trow\tframe\tsecond\tsrt_timestamp\n"]
     for grid_idx in range(total_grids):
         start = grid_idx * args.batch
         end = min(start + args.batch, len(frames))
         batch_frames = frames[start:end]
 
         grid_num = grid_idx + 1
-        output_path = output_dir / f"{args.video_id}_annotated_grid_{grid_num:{grid_fmt.replace('%', '').replace('d', '')}}.jpg"
-        # Simpler approach for formatting
-        if total_grids > 99:
-            fname = f"{args.video_id}_annotated_grid_{grid_num:03d}.jpg"
-        else:
-            fname = f"{args.video_id}_annotated_grid_{grid_num:02d}.jpg"
+        fname = f"{args.video_id}_annotated_grid_{grid_num:0{pad}d}.jpg"
         output_path = output_dir / fname
 
         create_annotated_grid(
@@ -186,29 +231,18 @@ def main():
             output_path,
             label_width=args.label_width,
             font_size=args.font_size,
+            font=font,
         )
+
+        for row_idx, (frame_num, _) in enumerate(batch_frames, 1):
+            sec = frame_num - 1
+            srt_time = format_srt_time(sec)
+            tsv_rows.append(f"{fname}\t{row_idx}\t_{frame_num:04d}\t{sec}\t{srt_time}\n")
+
         frame_range = f"_{batch_frames[0][0]:04d} to _{batch_frames[-1][0]:04d}"
         print(f"  Grid {grid_num:>{len(str(total_grids))}}/{total_grids}: {fname} ({frame_range})")
 
-    # Generate sidecar TSV: maps each grid row to its exact SRT timestamp
-    tsv_path = output_dir / f"{args.video_id}_timestamps.tsv"
-    with open(tsv_path, "w", encoding="utf-8") as tsv:
-        tsv.write("grid_file\trow\tframe\tsecond\tsrt_timestamp\n")
-        for grid_idx in range(total_grids):
-            start = grid_idx * args.batch
-            end = min(start + args.batch, len(frames))
-            batch_frames = frames[start:end]
-
-            grid_num = grid_idx + 1
-            if total_grids > 99:
-                fname = f"{args.video_id}_annotated_grid_{grid_num:03d}.jpg"
-            else:
-                fname = f"{args.video_id}_annotated_grid_{grid_num:02d}.jpg"
-
-            for row_idx, (frame_num, _) in enumerate(batch_frames, 1):
-                sec = frame_num - 1
-                srt_time = format_srt_time(sec)
-                tsv.write(f"{fname}\t{row_idx}\t_{frame_num:04d}\t{sec}\t{srt_time}\n")
+    tsv_path.write_text("".join(tsv_rows), encoding="utf-8")
 
     print(f"\nCreated {total_grids} annotated grids in {output_dir}")
     print(f"Sidecar timestamp file: {tsv_path}")
@@ -15,7 +15,8 @@ Frame timing: frame _NNNN.jpg corresponds to pts_time (NNNN - 1) seconds
 import argparse
 import json
 import os
-import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Dict, Tuple
 import sys
@@ -23,11 +24,83 @@ import sys
 import numpy as np
 from PIL import Image
 
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+try:
+    import orjson  # optional, much faster JSON serialization
+except ImportError:
+    orjson = None
+
+if njit is not None:
+    # Fused single-pass kernels: no full-frame temporaries, SIMD-vectorized
+    # and parallelized by numba. cache=True so only the first run pays JIT.
+
+    @njit(cache=True, fastmath=True, parallel=True)
+    def _abs_diff_mean(a, b):
+        h, w = a.shape
+        total = 0
+        for i in prange(h):
+            row = 0
+            for j in range(w):
+                row += abs(int(a[i, j]) - int(b[i, j]))
+            total += row
+        return total / (h * w)
+
+    @njit(cache=True, fastmath=True, parallel=True)
+    def _std2d(a):
+        h, w = a.shape
+        s = 0.0
+        ss = 0.0
+        for i in prange(h):
+            rs = 0.0
+            rss = 0.0
+            for j in range(w):
+                v = float(a[i, j])
+                rs += v
+                rss += v * v
+            s += rs
+            ss += rss
+        n = h * w
+        mean = s / n
+        return (ss / n - mean * mean) ** 0.5
+
+
+# Subtitle change detection doesn't need full resolution; comparing every
+# 4th pixel in each dimension cuts memory traffic per frame ~16x.
+DIFF_STRIDE = 4
+
+# Hamming distance below which two frames' average hashes are treated as
+# the same subtitle, skipping the full-array diff
+HASH_SAME_BITS = 4
+
+
+def average_hash(img: np.ndarray) -> int:
+    """64-bit average hash of a grayscale array (8x8 block-mean bitmap).
+
+    Each bit integrates a full block of pixels, so the hash is stable
+    against noise that single-pixel sampling would pick up."""
+    h, w = img.shape
+    bh, bw = max(1, h // 8), max(1, w // 8)
+    # Crop to a block-aligned shape, then mean over each 8x8 grid cell
+    thumb = img[:bh * 8, :bw * 8].reshape(8, bh, 8, bw).mean(axis=(1, 3))
+    bits = thumb > thumb.mean()
+    return int.from_bytes(np.packbits(bits.flatten()).tobytes(), 'big')
+
 
 def load_image_as_array(image_path: Path) -> np.ndarray:
-    """Load an image and convert to numpy array."""
-    img = Image.open(image_path)
-    return np.array(img)
+    """Load an image as a 2-D uint8 grayscale array, decimated by DIFF_STRIDE.
+
+    Grayscale halves the bytes decoded into numpy for RGB JPEGs, and the
+    decimated view is all the diff/blank checks need."""
+    img = Image.open(image_path).convert("L")
+    img.load()
+    # np.asarray wraps the decoded buffer without copying; copying just the
+    # decimated view releases the full-resolution buffer immediately, which
+    # matters now that the thread pool prefetches many frames ahead.
+    return np.asarray(img)[::DIFF_STRIDE, ::DIFF_STRIDE].copy()
 
 
 def calculate_frame_difference(img1: np.ndarray, img2: np.ndarray) -> float:
@@ -35,9 +108,14 @@ def calculate_frame_difference(img1: np.ndarray, img2: np.ndarray) -> float:
     Calculate the mean absolute pixel difference between two frames.
 
     Returns a value between 0 (identical) and 255 (completely different).
+    Subtracts in int16 (2 bytes/px) rather than float32 to halve the
+    temporary allocations.
     """
-    diff = np.abs(img1.astype(np.float32) - img2.astype(np.float32))
-    return np.mean(diff)
+    if njit is not None and img1.ndim == 2:
+        return float(_abs_diff_mean(img1, img2))
+    diff = np.subtract(img1, img2, dtype=np.int16)
+    np.abs(diff, out=diff)
+    return float(diff.mean())
 
 
 def is_blank_frame(img: np.ndarray, blank_threshold: float = 30.0) -> bool:
@@ -46,14 +124,14 @@ def is_blank_frame(img: np.ndarray, blank_threshold: float = 30.0) -> bool:
 
     Blank frames typically have low variance and dark/uniform colors.
     We check if the standard deviation of pixel values is below threshold.
+    Expects the 2-D grayscale array produced by load_image_as_array.
     """
-    # Convert to grayscale for simpler analysis
-    if len(img.shape) == 3:
-        gray = np.mean(img, axis=2)
-    else:
-        gray = img
+    if img.ndim == 3:  # tolerate callers passing RGB
+        img = np.mean(img, axis=2)
 
-    std_dev = np.std(gray)
+    if njit is not None and img.ndim == 2:
+        return _std2d(img) < blank_threshold
+    std_dev = np.std(img)
     return std_dev < blank_threshold
 
 
@@ -84,14 +162,18 @@ def segment_frames(
         - representative_frame: str (filename)
     """
     # Find all frames for this video
-    pattern = re.compile(rf'^{re.escape(video_id)}_(\d{{4}})\.jpg$')
+    prefix = f'{video_id}_'
     frame_files = []
 
-    for filename in sorted(os.listdir(frames_dir)):
-        match = pattern.match(filename)
-        if match:
-            frame_num = int(match.group(1))
-            frame_files.append((frame_num, filename))
+    with os.scandir(frames_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            if not (name.startswith(prefix) and name.endswith('.jpg')):
+                continue
+            frame_num = name[len(prefix):-4]
+            if len(frame_num) != 4 or not frame_num.isdigit():
+                continue  # skip grid composites and other non-frame files
+            frame_files.append((int(frame_num), name))
 
     if not frame_files:
         raise ValueError(f"No frames found for video_id: {video_id}")
@@ -99,76 +181,121 @@ def segment_frames(
     frame_files.sort()
     print(f"Found {len(frame_files)} frames for video {video_id}")
 
-    segments = []
-    current_segment = None
-    prev_img = None
-
-    for i, (frame_num, filename) in enumerate(frame_files):
-        frame_path = frames_dir / filename
-        curr_img = load_image_as_array(frame_path)
-
-        # Calculate timestamp (frame _NNNN corresponds to time NNNN-1)
-        timestamp = frame_num - 1
-
-        # Check if current frame is blank
-        is_blank = is_blank_frame(curr_img, blank_threshold)
-
-        if is_blank:
-            # End current segment if we hit a blank frame
-            if current_segment is not None:
-                segments.append(current_segment)
-                current_segment = None
-            prev_img = curr_img
-            continue
-
-        # Compare with previous frame (if exists and not blank)
-        if prev_img is not None and not is_blank_frame(prev_img, blank_threshold):
-            diff = calculate_frame_difference(prev_img, curr_img)
-            is_same_subtitle = diff < diff_threshold
-        else:
-            # First non-blank frame or after blank frame
-            is_same_subtitle = False
-
-        if not is_same_subtitle:
-            # Save previous segment if it exists
-            if current_segment is not None:
-                segments.append(current_segment)
-
-            # Start new segment
-            current_segment = {
-                'video_id': video_id,
-                'segment_id': len(segments) + 1,
-                'start_time': timestamp,
-                'end_time': timestamp,
-                'start_frame': frame_num,
-                'end_frame': frame_num,
-                'frame_count': 1,
-                'representative_frame': filename
-            }
-        else:
-            # Continue current segment
-            current_segment['end_time'] = timestamp
-            current_segment['end_frame'] = frame_num
-            current_segment['frame_count'] += 1
-
-        prev_img = curr_img
+    # Structure-of-arrays segment buffer: parallel columns instead of a
+    # ~200-byte dict per segment. Columns are cheap to append and scan;
+    # dicts are only zipped back together at the JSON boundary below.
+    seg_start_time = []
+    seg_end_time = []
+    seg_start_frame = []
+    seg_end_frame = []
+    seg_frame_count = []
+    seg_rep_frame = []
+
+    def close_segment():
+        seg_start_time.append(cs_start_time)
+        seg_end_time.append(cs_end_time)
+        seg_start_frame.append(cs_start_frame)
+        seg_end_frame.append(cs_end_frame)
+        seg_frame_count.append(cs_frame_count)
+        seg_rep_frame.append(cs_rep_frame)
+
+    # Current (open) segment as plain scalars
+    cs_open = False
+    cs_start_time = cs_end_time = 0
+    cs_start_frame = cs_end_frame = 0
+    cs_frame_count = 0
+    cs_rep_frame = ''
+
+    prev_img, prev_is_blank = None, True
+
+    # Prefetch decodes on a thread pool: Pillow's JPEG decode releases the
+    # GIL, so decoding the next frames overlaps with the segmentation logic
+    # below. ex.map preserves order, so the state machine is unchanged.
+    frame_paths = [frames_dir / filename for _, filename in frame_files]
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+        for (frame_num, filename), curr_img in zip(
+                frame_files, ex.map(load_image_as_array, frame_paths)):
+            # Calculate timestamp (frame _NNNN corresponds to time NNNN-1)
+            timestamp = frame_num - 1
+
+            # Check if current frame is blank
+            is_blank = is_blank_frame(curr_img, blank_threshold)
+            curr_hash = average_hash(curr_img)
+
+            if is_blank:
+                # End current segment if we hit a blank frame
+                if cs_open:
+                    close_segment()
+                    cs_open = False
+                prev_img, prev_hash, prev_is_blank = curr_img, curr_hash, True
+                continue
+
+            # Compare with previous frame (if exists and not blank); its
+            # blank verdict was already computed last iteration
+            if prev_img is not None and not prev_is_blank:
+                # Most adjacent frames hold the same subtitle for seconds at
+                # a time; a near-identical 64-bit hash settles those with an
+                # xor + popcount instead of a full-array diff.
+                if (prev_hash ^ curr_hash).bit_count() < HASH_SAME_BITS:
+                    is_same_subtitle = True
+                else:
+                    diff = calculate_frame_difference(prev_img, curr_img)
+                    is_same_subtitle = diff < diff_threshold
+            else:
+                # First non-blank frame or after blank frame
+                is_same_subtitle = False
+
+            if not is_same_subtitle:
+                # Save previous segment if it exists
+                if cs_open:
+                    close_segment()
+
+                # Start new segment
+                cs_open = True
+                cs_start_time = cs_end_time = timestamp
+                cs_start_frame = cs_end_frame = frame_num
+                cs_frame_count = 1
+                cs_rep_frame = filename
+            else:
+                # Continue current segment
+                cs_end_time = timestamp
+                cs_end_frame = frame_num
+                cs_frame_count += 1
+
+            prev_img, prev_hash, prev_is_blank = curr_img, curr_hash, False
 
     # Don't forget the last segment
-    if current_segment is not None:
-        segments.append(current_segment)
+    if cs_open:
+        close_segment()
 
-    # Filter out segments that are too short
+    # Filter out segments that are too short, zipping the surviving columns
+    # back into the dict shape save_segments_json expects
+    total = len(seg_start_time)
     filtered_segments = [
-        seg for seg in segments
-        if (seg['end_time'] - seg['start_time'] + 1) >= min_segment_duration
+        {
+            'video_id': video_id,
+            'segment_id': i + 1,
+            'start_time': seg_start_time[i],
+            'end_time': seg_end_time[i],
+            'start_frame': seg_start_frame[i],
+            'end_frame': seg_end_frame[i],
+            'frame_count': seg_frame_count[i],
+            'representative_frame': seg_rep_frame[i],
+        }
+        for i in range(total)
+        if (seg_end_time[i] - seg_start_time[i] + 1) >= min_segment_duration
     ]
 
-    print(f"Created {len(segments)} segments ({len(filtered_segments)} after filtering)")
+    print(f"Created {total} segments ({len(filtered_segments)} after filtering)")
     return filtered_segments
 
 
+@lru_cache(maxsize=None)
 def format_timestamp(seconds: float) -> str:
-    """Convert seconds to SRT timestamp format (HH:MM:SS,mmm)."""
+    """Convert seconds to SRT timestamp format (HH:MM:SS,mmm).
+
+    Memoized: the summary formats the same whole-second values repeatedly
+    and the domain is one entry per second of video."""
     hours = int(seconds // 3600)
     minutes = int((seconds % 3600) // 60)
     secs = int(seconds % 60)
@@ -178,8 +305,14 @@ def format_timestamp(seconds: float) -> str:
 
 def save_segments_json(segments: List[Dict], output_path: Path):
     """Save segments to JSON file."""
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(segments, f, indent=2, ensure_ascii=False)
+    if orjson is not None:
+        # orjson serializes straight to UTF-8 bytes (indent is 2 spaces,
+        # same as the fallback)
+        Path(output_path).write_bytes(
+            orjson.dumps(segments, option=orjson.OPT_INDENT_2))
+    else:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(segments, f, indent=2, ensure_ascii=False)
     print(f"Saved {len(segments)} segments to {output_path}")
 
 
@@ -203,13 +336,28 @@ def print_segment_summary(segments: List[Dict]):
     print("=" * 80)
 
 
+def _segment_one(video_id: str, args) -> tuple[str, int]:
+    """Segment one video and write its JSON (worker for the process pool)."""
+    segments = segment_frames(
+        frames_dir=args.frames_dir,
+        video_id=video_id,
+        diff_threshold=args.diff_threshold,
+        blank_threshold=args.blank_threshold,
+        min_segment_duration=args.min_duration
+    )
+    output_path = args.output_dir / f"{video_id}_segments.json"
+    save_segments_json(segments, output_path)
+    return video_id, len(segments)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Segment subtitle frames into groups with same text"
     )
     parser.add_argument(
-        'video_id',
-        help='Video identifier (e.g., "0-1", "1-2")'
+        'video_ids',
+        nargs='+',
+        help='One or more video identifiers (e.g., "0-1", "1-2")'
     )
     parser.add_argument(
         '--frames-dir',
@@ -244,7 +392,13 @@ def main():
     parser.add_argument(
         '--summary',
         action='store_true',
-        help='Print detailed segment summary'
+        help='Print detailed segment summary (single-video runs only)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=os.cpu_count(),
+        help='Worker processes when segmenting multiple videos (default: CPU count)'
     )
 
     args = parser.parse_args()
@@ -257,31 +411,38 @@ def main():
     # Create output directory
     args.output_dir.mkdir(parents=True, exist_ok=True)
 
-    # Segment frames
-    print(f"\nSegmenting frames for video: {args.video_id}")
+    print(f"\nSegmenting frames for video(s): {', '.join(args.video_ids)}")
     print(f"Frames directory: {args.frames_dir}")
     print(f"Difference threshold: {args.diff_threshold}")
     print(f"Blank threshold: {args.blank_threshold}")
     print(f"Min duration: {args.min_duration}s\n")
 
-    segments = segment_frames(
-        frames_dir=args.frames_dir,
-        video_id=args.video_id,
-        diff_threshold=args.diff_threshold,
-        blank_threshold=args.blank_threshold,
-        min_segment_duration=args.min_duration
-    )
-
-    # Save to JSON
-    output_path = args.output_dir / f"{args.video_id}_segments.json"
-    save_segments_json(segments, output_path)
-
-    # Print summary if requested
-    if args.summary:
-        print_segment_summary(segments)
-    else:
-        print(f"\nCreated {len(segments)} segments")
-        print(f"Use --summary flag to see detailed breakdown")
+    if len(args.video_ids) == 1:
+        # Single video: run inline so --summary can use the segments
+        segments = segment_frames(
+            frames_dir=args.frames_dir,
+            video_id=args.video_ids[0],
+            diff_threshold=args.diff_threshold,
+            blank_threshold=args.blank_threshold,
+            min_segment_duration=args.min_duration
+        )
+        output_path = args.output_dir / f"{args.video_ids[0]}_segments.json"
+        save_segments_json(segments, output_path)
+
+        if args.summary:
+            print_segment_summary(segments)
+        else:
+            print(f"\nCreated {len(segments)} segments")
+            print(f"Use --summary flag to see detailed breakdown")
+        return
+
+    # Multiple videos: fan out across processes. Each worker writes its own
+    # {video_id}_segments.json, so there is no shared output to contend on.
+    workers = min(args.workers or 1, len(args.video_ids))
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        for video_id, count in ex.map(_segment_one, args.video_ids,
+                                      [args] * len(args.video_ids)):
+            print(f"\n{video_id}: {count} segments")
 
 
 if __name__ == '__main__':
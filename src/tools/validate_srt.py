@@ -13,10 +13,22 @@ Without --fix, only reports issues. With --fix, writes corrected file in-place.
 import re
 import sys
 
+# Anchored header for one pre-split block; splitting on blank lines first
+# keeps the regex from scanning (and backtracking) across block boundaries
+_BLOCK_HDR_RE = re.compile(
+    r'^(\d+)\n(\d{2}:\d{2}:\d{2,},\d{3}) --> (\d{2}:\d{2}:\d{2,},\d{3})\n(.*)$',
+    re.DOTALL
+)
+
 
 def ts_to_ms(ts: str) -> int:
     """Convert SRT timestamp (HH:MM:SS,mmm) to milliseconds.
     Handles invalid seconds >= 60 by carrying over to minutes."""
+    if len(ts) == 12:
+        # Well-formed timestamps take fixed-offset slices, no split lists
+        return (int(ts[0:2]) * 3600000 + int(ts[3:5]) * 60000
+                + int(ts[6:8]) * 1000 + int(ts[9:12]))
+    # Nonstandard widths (e.g. a 3-digit seconds field) fall back to split
     h, m, rest = ts.split(':')
     s, ms = rest.split(',')
     total_seconds = int(h) * 3600 + int(m) * 60 + int(s)
@@ -35,10 +47,13 @@ def ms_to_ts(ms: int) -> str:
 
 def is_valid_ts(ts: str) -> bool:
     """Check if a timestamp has valid HH:MM:SS,mmm where SS < 60."""
-    m = re.match(r'(\d{2}):(\d{2}):(\d{2}),(\d{3})', ts)
-    if not m:
+    # Direct character checks; this runs twice per block so avoid the
+    # regex engine entirely
+    if len(ts) != 12 or ts[2] != ':' or ts[5] != ':' or ts[8] != ',':
+        return False
+    if not (ts[0:2] + ts[3:5] + ts[6:8] + ts[9:12]).isdigit():
         return False
-    return int(m.group(3)) < 60
+    return int(ts[6:8]) < 60
 
 
 def normalize_ts(ts: str) -> str:
@@ -49,17 +64,20 @@ def normalize_ts(ts: str) -> str:
 def parse_srt_raw(content: str):
     """Parse SRT content into blocks, preserving raw timestamps."""
     blocks = []
-    pattern = re.compile(
-        r'(\d+)\n(\d{2}:\d{2}:\d{2,},\d{3}) --> (\d{2}:\d{2}:\d{2,},\d{3})\n(.+?)(?=\n\n|\n*$)',
-        re.DOTALL
-    )
-    for m in pattern.finditer(content):
-        blocks.append({
-            'index': int(m.group(1)),
-            'start': m.group(2),
-            'end': m.group(3),
-            'text': m.group(4).strip(),
-        })
+    # Cheap sanity check before parsing the file
+    if '-->' not in content:
+        return blocks
+    for chunk in content.strip().split('\n\n'):
+        # Runs of 3+ newlines leave chunks with leading blank lines; strip
+        # them so the anchored header regex still matches
+        m = _BLOCK_HDR_RE.match(chunk.lstrip('\n'))
+        if m:
+            blocks.append({
+                'index': int(m.group(1)),
+                'start': m.group(2),
+                'end': m.group(3),
+                'text': m.group(4).strip(),
+            })
     return blocks
 
 
@@ -99,32 +117,29 @@ def validate_and_fix(filepath: str, fix: bool = False):
             issues.append(f"  Block {b['index']}: invalid end {old} → {b['end']}")
             fixed_count += 1
 
-    # Pass 2: Check for out-of-order blocks
+    # Parse each timestamp to milliseconds once, after normalization
+    for b in blocks:
+        b['start_ms'] = ts_to_ms(b['start'])
+        b['end_ms'] = ts_to_ms(b['end'])
+
+    # Passes 2-4 in one adjacent-pair sweep: out-of-order, overlapping, and
+    # duplicate checks all only need blocks[i-1] and blocks[i]
     for i in range(1, len(blocks)):
-        prev_start = ts_to_ms(blocks[i - 1]['start'])
-        curr_start = ts_to_ms(blocks[i]['start'])
-        if curr_start < prev_start:
+        prev, curr = blocks[i - 1], blocks[i]
+        if curr['start_ms'] < prev['start_ms']:
             issues.append(
-                f"  Block {blocks[i]['index']}: out-of-order "
-                f"(start {blocks[i]['start']} < prev start {blocks[i-1]['start']})"
+                f"  Block {curr['index']}: out-of-order "
+                f"(start {curr['start']} < prev start {prev['start']})"
             )
-
-    # Pass 3: Check for overlapping blocks (start < previous end)
-    for i in range(1, len(blocks)):
-        prev_end = ts_to_ms(blocks[i - 1]['end'])
-        curr_start = ts_to_ms(blocks[i]['start'])
-        if curr_start < prev_end:
+        if curr['start_ms'] < prev['end_ms']:
             issues.append(
-                f"  Block {blocks[i]['index']}: overlap "
-                f"(start {blocks[i]['start']} < prev end {blocks[i-1]['end']})"
+                f"  Block {curr['index']}: overlap "
+                f"(start {curr['start']} < prev end {prev['end']})"
             )
-
-    # Pass 4: Check for duplicate consecutive blocks (same text)
-    for i in range(1, len(blocks)):
-        if blocks[i]['text'] == blocks[i - 1]['text']:
+        if curr['text'] == prev['text']:
             issues.append(
-                f"  Block {blocks[i]['index']}: duplicate text with block {blocks[i-1]['index']} "
-                f"(\"{blocks[i]['text'][:30]}...\")"
+                f"  Block {curr['index']}: duplicate text with block {prev['index']} "
+                f"(\"{curr['text'][:30]}...\")"
             )
 
     # Report